@@ -1,5 +1,46 @@
+import re
+import httpx
 import streamlit as st
-import requests
+
+BACKEND_URL = "http://localhost:8000"
+REQUEST_TIMEOUT = 60.0
+
+# Same pattern as the backend: the 11-character video id in watch,
+# youtu.be, embed, shorts, and live URL shapes.
+_YT_VIDEO_ID = re.compile(r"(?:v=|youtu\.be/|/embed/|/shorts/|/live/)([A-Za-z0-9_-]{11})")
+
+# Marks a mid-stream backend failure inside an otherwise-200 answer stream;
+# must match STREAM_ERROR_PREFIX in backend.py.
+STREAM_ERROR_PREFIX = "\x1e"
+
+
+@st.cache_resource
+def get_client() -> httpx.Client:
+    """Pooled HTTP client reused across Streamlit reruns.
+
+    Keeping one client alive avoids a fresh TCP handshake per call.
+    """
+    return httpx.Client(base_url=BACKEND_URL, timeout=REQUEST_TIMEOUT)
+
+
+def _answer_chunks(response, state: dict):
+    """Yield answer text from a streamed /ask response.
+
+    Stops at a STREAM_ERROR_PREFIX marker, recording the error message in
+    state["error"] so the caller can report it and skip caching.
+
+    Args:
+        response (httpx.Response): Streaming response from /ask
+        state (dict): Receives "error" if the stream failed mid-way
+    """
+    for chunk in response.iter_text():
+        if STREAM_ERROR_PREFIX in chunk:
+            text, _, error = chunk.partition(STREAM_ERROR_PREFIX)
+            if text:
+                yield text
+            state["error"] = error
+            return
+        yield chunk
 
 
 def main():
@@ -15,53 +56,75 @@ def main():
     # Prompt the user for a YouTube video URL
     video_url = st.text_input("Enter YouTube Video URL:", key="video_url")
 
+    video_id = None
     # If the user provides a valid URL
     if video_url:
         # Extract the video ID from the URL
-        try:
-            if "youtube.com" in video_url:
-                video_id = video_url.split("v=")[1].split("&")[0]
-            elif "youtu.be" in video_url:
-                video_id = video_url.split(".be/")[1]
-            else:
-                st.error("Invalid YouTube URL. Please enter a valid one.")
-                return
-
-            # Embed the YouTube video in the app
-            st.video(f"https://www.youtube.com/embed/{video_id}")
-            # Call the write-captions endpoint
-            try:
-                response = requests.post(
-                    "http://localhost:8000/write-captions",
-                    json={"video_url": video_url}
-                )
-                if response.status_code == 200:
-                    st.write("Captions processed successfully")
-                else:
-                    st.error(f"Error processing captions: {response.text}")
-            except Exception as e:
-                st.error(f"Error calling write-captions endpoint: {str(e)}")
-        except Exception as e:
-            st.error(f"Error processing the URL: {e}")
+        match = _YT_VIDEO_ID.search(video_url)
+        if not match:
+            st.error("Invalid YouTube URL. Please enter a valid one.")
+            return
+        video_id = match.group(1)
+
+        # Embed the YouTube video in the app
+        st.video(f"https://www.youtube.com/embed/{video_id}")
     else:
         st.info("Please enter a YouTube video URL to see the video embedded here.")
 
-    # Add a text input for questions
-    question = st.text_input("Ask a question about the video:", key="question")
+    # Gate the question on an explicit submit: Streamlit reruns main() on
+    # every keystroke, and without the form each rerun would hit /ask.
+    with st.form("qa_form"):
+        question = st.text_input("Ask a question about the video:", key="question")
+        submitted = st.form_submit_button("Ask")
+
+    # Answers already fetched this session, keyed by (video_id, question),
+    # so plain reruns re-render without calling the backend.
+    answers = st.session_state.setdefault("answers", {})
+    answer_key = (video_id, question)
+
+    # Only index a video once per session; later reruns skip straight to
+    # questions.
+    needs_indexing = video_id is not None and st.session_state.get("indexed_video_id") != video_id
 
-    # If user enters a question, make API call
-    if question:
+    # /ask depends on /write-captions having indexed the video, so the two
+    # calls must be sequenced; asking against an unindexed video would only
+    # produce (and cache) a "no answer" response. The video is already
+    # embedded above, so it plays while we wait.
+    indexing_ok = not needs_indexing
+    if needs_indexing:
         try:
-            response = requests.post(
-                "http://localhost:8000/ask",
-                json={"question": question}
-            )
-            if response.status_code == 200:
-                st.write("Answer:", response.json())
+            with st.spinner("Indexing video captions..."):
+                captions_response = get_client().post("/write-captions", json={"video_url": video_url})
+            if captions_response.status_code == 200:
+                st.session_state["indexed_video_id"] = video_id
+                st.write("Captions processed successfully")
+                indexing_ok = True
             else:
-                st.error(f"Error getting answer: {response.text}")
+                st.error(f"Error processing captions: {captions_response.text}")
+        except Exception as e:
+            st.error(f"Error calling write-captions endpoint: {str(e)}")
+
+    if submitted and question and indexing_ok:
+        try:
+            # Stream the answer so tokens render as the backend produces
+            # them instead of waiting for the full generation.
+            with get_client().stream("POST", "/ask", json={"question": question, "video_id": video_id}) as response:
+                if response.status_code == 200:
+                    st.write("Answer:")
+                    stream_state = {}
+                    answer = st.write_stream(_answer_chunks(response, stream_state))
+                    if stream_state.get("error"):
+                        # Don't cache a failed stream; reruns should retry.
+                        st.error(stream_state["error"])
+                    else:
+                        answers[answer_key] = answer
+                else:
+                    st.error(f"Error getting answer: {response.read().decode()}")
         except Exception as e:
             st.error(f"Error making API request: {str(e)}")
+    elif question and answer_key in answers:
+        st.write("Answer:", answers[answer_key])
+
 
 if __name__ == "__main__":
     main()
@@ -5,14 +5,308 @@ from phi.vectordb.pgvector import PgVector
 from phi.embedder.google import GeminiEmbedder
 from phi.document.chunking.fixed import FixedSizeChunking
 from phi.document.chunking.document import DocumentChunking
+from phi.document.base import Document
+import asyncio
+import diskcache
+import hashlib
+import json
+import math
 import os
-from phi.agent import Agent, RunResponse
+import re
+import threading
+from psycopg_pool import ConnectionPool
+from functools import lru_cache
+from phi.agent import Agent
 from phi.model.google import Gemini
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+
+DB_URL = "postgresql+psycopg://ai:ai@localhost:5532/ai"
+PSYCOPG_DB_URL = "postgresql://ai:ai@localhost:5532/ai"
+
+# Shared connection pool for the direct-psycopg paths (semantic cache, bulk
+# COPY ingest, index maintenance). Reusing warm connections avoids the
+# ~5-20ms connect/auth cost per statement under load.
+_pool = ConnectionPool(
+    PSYCOPG_DB_URL,
+    min_size=2,
+    max_size=10,
+    kwargs={"autocommit": True},
+    open=False,
+)
+
+
+def _db_connection():
+    """Check out a pooled Postgres connection (context manager)."""
+    if _pool.closed:
+        _pool.open()
+    return _pool.connection()
+
+# Semantic cache settings: answers for questions whose embeddings are within
+# this cosine distance of a cached question are reused instead of re-running
+# the agent. Entries expire after the TTL.
+QA_CACHE_DISTANCE_THRESHOLD = 0.15
+QA_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Number of chunks embedded per Gemini API call during ingest. One request
+# per 100 chunks instead of one per chunk keeps indexing network-bound on a
+# handful of round-trips rather than hundreds.
+EMBED_BATCH_SIZE = 100
+
+# Gemini embeddings are Matryoshka-style: the leading dimensions carry most
+# of the signal, so truncating 768 -> 256 shrinks the pgvector index and
+# distance computations 3x with little recall loss on transcript RAG.
+EMBED_DIMENSIONS = 256
+
+
+class BatchGeminiEmbedder(GeminiEmbedder):
+    """GeminiEmbedder that can embed many texts in a single API call."""
+
+    @staticmethod
+    def _truncate_normalize(embedding: list) -> list:
+        """Truncate an embedding to EMBED_DIMENSIONS and renormalize.
+
+        Truncated vectors are no longer unit length, so renormalize to
+        keep cosine distances comparable.
+        """
+        embedding = list(embedding)[:EMBED_DIMENSIONS]
+        norm = math.sqrt(sum(x * x for x in embedding))
+        if norm > 0:
+            embedding = [x / norm for x in embedding]
+        return embedding
+
+    def get_embedding(self, text: str) -> list:
+        return self._truncate_normalize(super().get_embedding(text))
+
+    def get_embeddings_batch(self, texts: list) -> list:
+        """Embed a list of texts, batching EMBED_BATCH_SIZE per request.
+
+        Args:
+            texts (list): Texts to embed
+
+        Returns:
+            list: One embedding (list of floats) per input text
+        """
+        embeddings = []
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            batch = texts[start:start + EMBED_BATCH_SIZE]
+            # Go through phi's configured client so the embedder's api_key
+            # applies and batches get the same task_type conditioning as
+            # single-text embeddings from get_embedding.
+            response = self.client.embed_content(
+                model=self.model,
+                content=batch,
+                task_type=self.task_type,
+                output_dimensionality=self.dimensions,
+            )
+            embeddings.extend(self._truncate_normalize(e) for e in response["embedding"])
+        return embeddings
+
+
+# Gemini client singletons. Constructing these per request re-reads API
+# keys, re-validates config, and re-creates HTTP sessions, so one of each
+# is shared by the agent, the knowledge base, and the semantic cache.
+GEMINI_MODEL_ID = "gemini-2.0-flash-exp"
+
+_embedder = BatchGeminiEmbedder(dimensions=EMBED_DIMENSIONS)
+_gemini_model = Gemini(id=GEMINI_MODEL_ID)
+
+# Exact response the agent is instructed to give when the knowledge base has
+# no answer; such responses are never cached.
+NO_ANSWER_RESPONSE = "Video does not have the answer to that."
+
+# Control character prepended to an in-stream error message so clients can
+# tell a mid-stream failure apart from answer text (the stream is already a
+# 200 by then). ASCII record separator never occurs in model output.
+STREAM_ERROR_PREFIX = "\x1e"
+
+# Shared knowledge base / agent singletons. Building these per request opens a
+# fresh Postgres connection and Gemini client every time, so they are created
+# once at startup and reused by the endpoints.
+_kb_lock = threading.Lock()
+_knowledge_base = None
+_agent = None
+
+
+def _build_knowledge_base() -> TextKnowledgeBase:
+    """Build the pgvector-backed knowledge base over the captions directory."""
+    return TextKnowledgeBase(
+        path="data/txt_files",
+        vector_db=PgVector(
+            table_name="text_documents",
+            db_url=DB_URL,
+            embedder=_embedder,
+        ),
+        # Larger chunks cut the chunk count (and with it embedding calls,
+        # pgvector rows, and HNSW graph size) ~3x versus the default;
+        # transcripts are low-density enough that recall holds up.
+        chunking_strategy=FixedSizeChunking(chunk_size=1500, overlap=100),
+    )
+
+
+def _build_agent(knowledge_base: TextKnowledgeBase) -> Agent:
+    """Build the RAG agent on top of the shared knowledge base."""
+    return Agent(
+        model=_gemini_model,
+        knowledge=knowledge_base,
+        search_knowledge=True,
+        debug_mode=True,
+        instructions=["You are an RAG agent, use the knowledge base only to answer the question",
+                    "You are an intelligent and concise assistant. When answering, strictly adhere to the following rules:",
+                    "Direct Answers Only: Provide a direct and accurate answer to the question asked based on the available knowledge.",
+                    "No Unnecessary Information: Do not list or mention the topics or information you have in your knowledge base unless directly relevant to the question.",
+                    f"Admit Uncertainty: If you do not know the answer or cannot find the information, respond only with: '{NO_ANSWER_RESPONSE}'",
+                    "Always ensure your responses are precise, to the point, and strictly follow these rules."],
+    )
+
+
+def get_knowledge_base() -> TextKnowledgeBase:
+    """Return the shared knowledge base, creating it on first use."""
+    global _knowledge_base
+    with _kb_lock:
+        if _knowledge_base is None:
+            _knowledge_base = _build_knowledge_base()
+    return _knowledge_base
+
+
+def get_agent() -> Agent:
+    """Return a per-request copy of the shared agent.
+
+    phi's Agent mutates instance state while running (run_id, the streamed
+    run_response, memory.runs), so handing the singleton to concurrent
+    requests would interleave one stream's tokens into another. Copying is
+    cheap next to a generation call, shares the already-built model and
+    knowledge base, and keeps the template's memory from growing across
+    requests.
+    """
+    global _agent
+    knowledge_base = get_knowledge_base()
+    with _kb_lock:
+        if _agent is None:
+            _agent = _build_agent(knowledge_base)
+    return _agent.deep_copy()
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Create the knowledge base and agent once so requests don't pay for it."""
+    _pool.open()
+    get_agent()
+    _ensure_qa_cache_table()
+
+
+def _vector_literal(embedding: list) -> str:
+    """Format an embedding as a pgvector text literal.
+
+    json.dumps runs the 768-float loop in C and its compact output is
+    valid pgvector syntax, so this beats joining str(x) per element.
+    """
+    return json.dumps(list(embedding), separators=(",", ":"))
+
+
+def _ensure_qa_cache_table():
+    """Create the semantic cache table, recreating it on dimension change.
+
+    CREATE TABLE IF NOT EXISTS never alters an existing table, so a
+    qa_cache created under a previous EMBED_DIMENSIONS would reject every
+    lookup and insert with a dimension mismatch. Cached answers are
+    disposable, so on mismatch the table is dropped and rebuilt.
+    """
+    ddl = f"""
+        CREATE TABLE IF NOT EXISTS qa_cache (
+            question_embedding vector({EMBED_DIMENSIONS}),
+            question text,
+            answer text,
+            video_id text,
+            ts timestamptz DEFAULT now()
+        )
+    """
+    try:
+        with _db_connection() as conn:
+            conn.execute(ddl)
+            # pgvector keeps the dimension in the column's type modifier.
+            row = conn.execute(
+                """
+                SELECT atttypmod FROM pg_attribute
+                WHERE attrelid = 'qa_cache'::regclass
+                  AND attname = 'question_embedding'
+                """
+            ).fetchone()
+            if row and row[0] != EMBED_DIMENSIONS:
+                print(f"qa_cache dimension changed ({row[0]} -> {EMBED_DIMENSIONS}), recreating")
+                conn.execute("DROP TABLE qa_cache")
+                conn.execute(ddl)
+    except Exception as e:
+        print(f"Could not create qa_cache table: {str(e)}")
+
+
+@lru_cache(maxsize=2048)
+def _embed_cached(model_id: str, text: str) -> tuple:
+    """Embed text, memoizing on (model, text) to skip repeat API calls.
+
+    Returns a tuple so the result is hashable for the cache; callers
+    convert back to a list. Keying on the model id keeps stale vectors
+    from surviving an embedder model change.
+    """
+    return tuple(_embedder.get_embedding(text))
+
+
+def _question_embedding(question: str) -> list:
+    """Embed a question with the shared Gemini embedder."""
+    return list(_embed_cached(_embedder.model, question))
+
+
+def _cached_answer(question_embedding: list, video_id: str) -> str:
+    """Look up a cached answer for a semantically similar question.
+
+    Args:
+        question_embedding (list): Embedding of the incoming question
+        video_id (str): Video the question is about
+
+    Returns:
+        str: Cached answer, or None on a cache miss
+    """
+    try:
+        with _db_connection() as conn:
+            # Expire old entries before probing so stale answers never match.
+            conn.execute(
+                "DELETE FROM qa_cache WHERE ts < now() - %s * interval '1 second'",
+                (QA_CACHE_TTL_SECONDS,),
+            )
+            row = conn.execute(
+                """
+                SELECT answer, question_embedding <=> %s::vector AS distance
+                FROM qa_cache
+                WHERE video_id = %s
+                ORDER BY distance
+                LIMIT 1
+                """,
+                (_vector_literal(question_embedding), video_id),
+            ).fetchone()
+        if row and row[1] < QA_CACHE_DISTANCE_THRESHOLD:
+            return row[0]
+    except Exception as e:
+        print(f"qa_cache lookup failed: {str(e)}")
+    return None
+
+
+def _store_answer(question: str, question_embedding: list, answer: str, video_id: str):
+    """Store a question/answer pair in the semantic cache."""
+    try:
+        with _db_connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO qa_cache (question_embedding, question, answer, video_id)
+                VALUES (%s::vector, %s, %s, %s)
+                """,
+                (_vector_literal(question_embedding), question, answer, video_id),
+            )
+    except Exception as e:
+        print(f"qa_cache insert failed: {str(e)}")
 
 class CaptionRequest(BaseModel):
     video_url: str
@@ -29,22 +323,51 @@ async def write_captions(request: CaptionRequest):
     Returns:
         dict: Response containing status message
     """
-    result = write_captions_to_file_api(request.video_url, request.languages)
+    # Transcript fetch, file I/O, and indexing are all blocking; run them in
+    # a worker thread so the event loop keeps serving other requests.
+    result = await asyncio.to_thread(write_captions_to_file_api, request.video_url, request.languages)
     if result["status"] == "error":
         raise HTTPException(status_code=400, detail=result["message"])
     return result
 
+# Matches the 11-character video id in watch, youtu.be, embed, shorts, and
+# live URL shapes, with or without extra query parameters.
+_YT_VIDEO_ID = re.compile(r"(?:v=|youtu\.be/|/embed/|/shorts/|/live/)([A-Za-z0-9_-]{11})")
+
+
 def get_youtube_video_id(url: str) -> str:
     """Extract the video ID from a YouTube URL."""
+    match = _YT_VIDEO_ID.search(url)
+    if not match:
+        raise ValueError("Invalid YouTube URL format")
+    return match.group(1)
+
+# Parsed transcripts cached on disk for a day, keyed by (video_id,
+# languages). Repeat views of the same video skip the YouTube round-trip.
+_transcript_cache = diskcache.Cache("data/.transcript_cache")
+
+
+@_transcript_cache.memoize(expire=86400)
+def _fetch_transcript(video_id: str, languages: tuple) -> list:
+    """Fetch the raw transcript lines for a video.
+
+    Args:
+        video_id (str): YouTube video ID
+        languages (tuple): Preferred caption languages (tuple so the call
+            is hashable for the cache)
+
+    Returns:
+        list: Transcript lines as returned by YouTubeTranscriptApi
+    """
+    kwargs = {}
+    if languages:
+        kwargs["languages"] = list(languages)
     try:
-        if "youtube.com/watch?v=" in url:
-            return url.split("v=")[1].split("&")[0]
-        elif "youtu.be/" in url:
-            return url.split("/")[-1]
-        else:
-            raise ValueError("Invalid YouTube URL format")
-    except Exception as e:
-        raise ValueError(f"Error extracting video ID: {str(e)}")
+        return YouTubeTranscriptApi.get_transcript(video_id, **kwargs)
+    except NoTranscriptFound:
+        # Attempt automatic captions
+        return YouTubeTranscriptApi.get_transcript(video_id, languages=["auto"])
+
 
 def get_youtube_video_captions(url: str, languages: list = None) -> str:
     """Fetch captions from a YouTube video.
@@ -65,20 +388,14 @@ def get_youtube_video_captions(url: str, languages: list = None) -> str:
         return str(e)
 
     try:
-        kwargs = {}
-        if languages:
-            kwargs["languages"] = languages
-
-        captions = None
-        try:
-            captions = YouTubeTranscriptApi.get_transcript(video_id, **kwargs)
-        except NoTranscriptFound:
-            # Attempt automatic captions
-            captions = YouTubeTranscriptApi.get_transcript(video_id, languages=["auto"])
+        captions = _fetch_transcript(video_id, tuple(languages) if languages else ())
 
         if not captions:
             return "No captions available for this video."
-        return " ".join(line["text"] for line in captions)
+        # List comprehension over a generator: join materializes a list
+        # internally anyway, and skipping the generator protocol is
+        # measurably faster on multi-thousand-line transcripts.
+        return " ".join([line["text"] for line in captions])
     except TranscriptsDisabled:
         return "Transcripts are disabled for this video."
     except NoTranscriptFound:
@@ -98,6 +415,10 @@ def write_captions_to_file_api(video_url: str, languages: list = None) -> dict:
     """
     try:
         result = write_captions_to_file(video_url, languages)
+        # write_captions_to_file reports failures as strings; surface them
+        # as errors instead of a success envelope.
+        if result.startswith("Error") or result.startswith("Could not"):
+            return {"status": "error", "message": result}
         return {"status": "success", "message": result}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -118,6 +439,15 @@ def write_captions_to_file(video_url: str, languages: list = None) -> str:
         video_id = get_youtube_video_id(video_url)
         print("Video ID:")
         print(video_id)
+
+        # Fast path: this video was already fetched and indexed, so skip the
+        # YouTube round-trip and the knowledge base reload entirely. Gate on
+        # the ingest manifest, which is only written after a successful
+        # insert — file existence alone would make a failed ingest permanent.
+        filename = f"data/txt_files/{video_id}.txt"
+        if os.path.exists(filename) and _load_manifest().get(video_id) == _file_sha256(filename):
+            return f"Already indexed {filename}"
+
         captions = get_youtube_video_captions(video_url, languages)
         print("Captions:")
         print(captions)
@@ -127,69 +457,203 @@ def write_captions_to_file(video_url: str, languages: list = None) -> str:
             
         # Create data directory if it doesn't exist
         os.makedirs("data/txt_files", exist_ok=True)
-        
+
         # Write captions to file
-        filename = f"data/txt_files/{video_id}.txt"
         with open(filename, "w", encoding="utf-8") as f:
             f.write(captions)
         
-        create_knowledge_base_with_captions()
+        result = create_knowledge_base_with_captions(filename)
+        if result.startswith("Error"):
+            return result
         return f"Successfully wrote captions to {filename}"
         
     except Exception as e:
         return f"Error writing captions to file: {str(e)}"
 
 
-def create_knowledge_base_with_captions() -> str:
+# phi's PgVector provisions its table inside this schema, so every raw SQL
+# statement must qualify the name or it would resolve to public.text_documents.
+VECTOR_SCHEMA = "ai"
+VECTOR_TABLE = f"{VECTOR_SCHEMA}.text_documents"
+
+
+def _insert_documents(documents: list):
+    """Bulk-load pre-embedded document chunks into the pgvector table.
+
+    Uses COPY ... FROM STDIN, which skips the per-row parse/plan/commit
+    overhead of individual INSERTs. COPY cannot upsert, so existing rows
+    for the same chunk ids and source videos are deleted first; deleting
+    by video_id also clears stale chunks when a transcript shrinks.
+
+    Args:
+        documents (list): phi Documents with their embedding already set
+    """
+    video_ids = sorted({
+        document.meta_data["video_id"]
+        for document in documents
+        if document.meta_data and "video_id" in document.meta_data
+    })
+    with _db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"DELETE FROM {VECTOR_TABLE} WHERE id = ANY(%s) OR meta_data->>'video_id' = ANY(%s)",
+                ([document.id for document in documents], video_ids),
+            )
+            with cur.copy(
+                f"COPY {VECTOR_TABLE} (id, name, meta_data, content, embedding) FROM STDIN"
+            ) as copy:
+                for document in documents:
+                    copy.write_row((
+                        document.id,
+                        document.name,
+                        json.dumps(document.meta_data or {}),
+                        document.content,
+                        _vector_literal(document.embedding),
+                    ))
+
+
+# Manifest of video_id -> sha256 of the indexed captions file, so unchanged
+# files are never re-embedded.
+INGEST_MANIFEST = "data/.ingested.json"
+
+
+def _load_manifest() -> dict:
+    """Read the ingest manifest, or an empty one if it doesn't exist."""
+    try:
+        with open(INGEST_MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_manifest(manifest: dict):
+    """Write the ingest manifest."""
+    with open(INGEST_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+
+def _file_sha256(filename: str) -> str:
+    """Hash a file's contents."""
+    with open(filename, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+VECTOR_INDEX_NAME = "text_documents_embedding_idx"
+
+
+def _drop_vector_index():
+    """Drop the HNSW index ahead of a full rebuild.
+
+    Inserting into an indexed table updates the HNSW graph row by row,
+    which is far slower than loading first and indexing once.
+    """
+    with _db_connection() as conn:
+        conn.execute(f"DROP INDEX IF EXISTS {VECTOR_SCHEMA}.{VECTOR_INDEX_NAME}")
+
+
+def _create_vector_index():
+    """Build the HNSW index over text_documents after a bulk load."""
+    with _db_connection() as conn:
+        # SET LOCAL inside one transaction so the bumped maintenance
+        # settings end with the index build instead of sticking to the
+        # pooled connection for its lifetime.
+        with conn.transaction():
+            conn.execute("SET LOCAL maintenance_work_mem = '2GB'")
+            conn.execute("SET LOCAL max_parallel_maintenance_workers = 7")
+            conn.execute(
+                f"""
+                CREATE INDEX IF NOT EXISTS {VECTOR_INDEX_NAME}
+                ON {VECTOR_TABLE} USING hnsw (embedding vector_cosine_ops)
+                WITH (m = 16, ef_construction = 64)
+                """
+            )
+
+
+def _index_captions_file(filename: str) -> int:
+    """Chunk a captions file, batch-embed the chunks, and upsert them.
+
+    Embeds all chunks in EMBED_BATCH_SIZE batches instead of letting phi's
+    loader make one embedding call per chunk.
+
+    Args:
+        filename (str): Path to the captions text file
+
+    Returns:
+        int: Number of chunks indexed
+    """
+    name = os.path.splitext(os.path.basename(filename))[0]
+
+    # Skip files whose contents haven't changed since they were indexed.
+    manifest = _load_manifest()
+    file_hash = _file_sha256(filename)
+    if manifest.get(name) == file_hash:
+        print(f"Captions for {name} unchanged, skipping ingest")
+        return 0
+
+    with open(filename, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    knowledge_base = get_knowledge_base()
+    chunks = knowledge_base.chunking_strategy.chunk(Document(id=name, name=name, content=text))
+
+    embeddings = _embedder.get_embeddings_batch([chunk.content for chunk in chunks])
+    for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+        if chunk.id is None:
+            chunk.id = f"{name}_{i}"
+        chunk.embedding = embedding
+        # Tag chunks with their source video so retrieval can be scoped.
+        chunk.meta_data = {**(chunk.meta_data or {}), "video_id": name}
+
+    # Make sure the table exists before bypassing phi's insert path.
+    knowledge_base.vector_db.create()
+    _insert_documents(chunks)
+
+    manifest[name] = file_hash
+    _save_manifest(manifest)
+    return len(chunks)
+
+
+def create_knowledge_base_with_captions(filename: str = None, recreate: bool = False) -> str:
     """Create a text knowledge base and add YouTube video captions to it.
-    
-        
+
+    Args:
+        filename (str): Captions file to index; when omitted, the whole
+            captions directory is loaded through phi's loader
+        recreate (bool): Rebuild the table from scratch; the HNSW index is
+            dropped for the load and built once afterwards, which is much
+            faster than maintaining it per inserted row
+
     Returns:
         str: Status message
     """
     try:
-        knowledge_base = TextKnowledgeBase(
-            path="data/txt_files",
-            vector_db=PgVector(
-                table_name="text_documents", 
-                db_url="postgresql+psycopg://ai:ai@localhost:5532/ai",
-                embedder=GeminiEmbedder(dimensions=768),
-            ),
-            chunking_strategy=FixedSizeChunking(),
-        )
-    
-        
-        # Add captions to knowledge base
-        knowledge_base.load(recreate=False)
+        if filename:
+            chunk_count = _index_captions_file(filename)
+            print(f"Knowledge base loaded ({chunk_count} chunks)")
+        else:
+            knowledge_base = get_knowledge_base()
 
-        print("Knowledge base loaded")
+            if recreate:
+                _drop_vector_index()
+
+            # Add captions to knowledge base
+            knowledge_base.load(recreate=recreate, upsert=True)
+
+            if recreate:
+                _create_vector_index()
+
+            print("Knowledge base loaded")
 
-        
-        agent = Agent(
-            model=Gemini(id="gemini-2.0-flash-exp"),
-            knowledge=knowledge_base,
-            search_knowledge=True,
-            show_tool_calls=True,
-            markdown=True,
-            debug_mode=True,
-            instructions=["You are an RAG agent, use the knowledge base only to answer the question",
-                          "You are an intelligent and concise assistant. When answering, strictly adhere to the following rules:",
-                          "Direct Answers Only: Provide a direct and accurate answer to the question asked based on the available knowledge.",
-                          "No Unnecessary Information: Do not list or mention the topics or information you have in your knowledge base unless directly relevant to the question.",
-                          "Admit Uncertainty: If you do not know the answer or cannot find the information, respond only with: 'I don’t know the answer to that.'",
-                          "Always ensure your responses are precise, to the point, and strictly follow these rules."],
-        )
-        
         return f"Successfully created knowledge base and added captions for video"
-    
-        
-        
+
     except Exception as e:
         return f"Error creating knowledge base with captions: {str(e)}"
 
 
 class QuestionRequest(BaseModel):
     question: str
+    video_id: str = None
+    no_cache: bool = False
 
 
 @app.get("/")
@@ -199,53 +663,52 @@ async def root():
 
 @app.post("/ask")
 async def ask_question(request: QuestionRequest):
-    try:
-        answer = get_answer(request.question)
-        return {answer}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    
-def get_answer(question: str) -> str:
-    """Get answer from the agent based on the knowledge base.
-    
+    # The sync generator blocks on Gemini; StreamingResponse iterates it
+    # in a worker thread, sending chunks as soon as they arrive instead
+    # of buffering the full answer.
+    return StreamingResponse(
+        stream_answer(request.question, video_id=request.video_id, no_cache=request.no_cache),
+        media_type="text/plain",
+    )
+
+def stream_answer(question: str, video_id: str = None, no_cache: bool = False):
+    """Stream the agent's answer chunk by chunk.
+
+    Yields the cached answer in one piece on a semantic-cache hit;
+    otherwise yields content as the agent generates it and stores the
+    assembled answer in the cache at the end. The cache is only consulted
+    when the client says which video it is asking about.
+
     Args:
         question (str): Question to ask the agent
-        
-    Returns:
-        str: Agent's response
+        video_id (str): Video the question is about; namespaces the cache
+        no_cache (bool): Skip the semantic answer cache
     """
     try:
-        knowledge_base = TextKnowledgeBase(
-            path="data/txt_files", 
-            vector_db=PgVector(
-                table_name="text_documents",
-                db_url="postgresql+psycopg://ai:ai@localhost:5532/ai",
-                embedder=GeminiEmbedder(dimensions=768),
-            ),
-            chunking_strategy=FixedSizeChunking(),
-        )
+        question_embedding = None
+        if not no_cache and video_id:
+            question_embedding = _question_embedding(question)
+            cached = _cached_answer(question_embedding, video_id)
+            if cached is not None:
+                print("Answer served from qa_cache")
+                yield cached
+                return
 
-        agent = Agent(
-            model=Gemini(id="gemini-2.0-flash-exp"),
-            knowledge=knowledge_base,
-            search_knowledge=True,
-            #show_tool_calls=True,
-            #markdown=True,
-            debug_mode=True,
-            instructions=["You are an RAG agent, use the knowledge base only to answer the question",
-                        "You are an intelligent and concise assistant. When answering, strictly adhere to the following rules:",
-                        "Direct Answers Only: Provide a direct and accurate answer to the question asked based on the available knowledge.",
-                        "No Unnecessary Information: Do not list or mention the topics or information you have in your knowledge base unless directly relevant to the question.",
-                        "Admit Uncertainty: If you do not know the answer or cannot find the information, respond only with: 'Video does not have the answer to that.'",
-                        "Always ensure your responses are precise, to the point, and strictly follow these rules."],
-        )
-        
-        response: RunResponse = agent.run(question, content_type="str",stream=False)
-        return response.content
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting answer: {str(e)}")
+        agent = get_agent()
 
+        parts = []
+        for chunk in agent.run(question, stream=True):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
 
-    
-    
+        answer = "".join(parts)
+        # Don't let "no answer" responses stick for the full TTL; the video
+        # may simply not be indexed yet.
+        if question_embedding is not None and NO_ANSWER_RESPONSE not in answer:
+            _store_answer(question, question_embedding, answer, video_id)
+    except Exception as e:
+        # By the time a generator fails the 200 and headers are already on
+        # the wire; the prefix lets the client distinguish this from answer
+        # text instead of rendering and caching it as one.
+        yield f"{STREAM_ERROR_PREFIX}Error getting answer: {str(e)}"